@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """calibrate.py
-usage: calibrate.py [-h] -i INPUT [-l LEFT [LEFT ...]] [-r RIGHT [RIGHT ...]] [-m MAX_WEIGHT] [--cal-in CAL_IN] [--cal-out CAL_OUT]
+usage: calibrate.py [-h] -i INPUT [-l LEFT [LEFT ...]] [-r RIGHT [RIGHT ...]] [-m MAX_WEIGHT] [--no-cache] [--cal-in CAL_IN] [--cal-out CAL_OUT]
 
 Plots the weight vs calibration data and calculates the required coeficients and offsets.
 
@@ -14,6 +14,7 @@ options:
                         The sheets in the spreadsheet containing the right data. (default: None)
   -m MAX_WEIGHT, --max-weight MAX_WEIGHT
                         The maximum x value to show (weight in kg). (default: 50)
+  --no-cache            If present, always parses the spreadsheet and does not read or write cached sheets. (default: False)
 
 Loading and saving calibration data:
   If provided, a json file will be generated with configuration values.
@@ -24,60 +25,217 @@ Loading and saving calibration data:
 Written by Jotham Gates and Oscar Varney for MHP, 2024
 """
 import argparse
+import hashlib
+import importlib.util
+import os
+import pickle
 import pandas as pd
 import numpy as np
-from typing import Tuple, Union, List
+from typing import Tuple, Union, List, NamedTuple
+from dataclasses import dataclass, field
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 from matplotlib.lines import Line2D
-from sklearn.linear_model import LinearRegression
 
-from common import none_empty_list, Side, StrainConfig, PowerMeterConfig
+from common import none_empty_list, Side, StrainConfig, PowerMeterConfig, njit, prange
 
 GRAVITY = 9.81
 CRANK_LENGTH = 0.13
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "calibrate")
+# Only these columns are used, so the rest aren't loaded
+SHEET_COLUMNS = ["Weight", "Raw", "Temp"]
+SHEET_DTYPES = {"Weight": np.float64, "Raw": np.float64, "Temp": np.float64}
+
+# Calamine (written in rust) is much faster than openpyxl at parsing workbooks and reads
+# xlsx, xls and ods files. Use it if it is installed, otherwise let pandas pick the reader
+# based on the file type.
+if importlib.util.find_spec("python_calamine") is not None:
+    EXCEL_ENGINE = "calamine"
+else:
+    EXCEL_ENGINE = None
+
+
+class LinearFit(NamedTuple):
+    """Straight line of best fit (raw = gradient * weight + offset)."""
+
+    gradient: float
+    offset: float
+    r2: float  # R^2 against the data the line was fitted to
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """Evaluates the line at the given x values.
+
+        Args:
+            x (np.ndarray): The x values (converted weights).
+
+        Returns:
+            np.ndarray: The predicted raw readings.
+        """
+        return self.gradient * x + self.offset
+
+
+@dataclass
+class SheetData:
+    """The columns of a calibration sheet as numpy arrays, so they don't have to be pulled
+    out of a DataFrame each time they are used."""
+
+    weight: np.ndarray  # Weight applied in kg
+    raw: np.ndarray  # Reading from the ADC
+    temp: np.ndarray  # Temperature in C
+    temp_mean: float = field(init=False)  # Average temperature, used in labels and plots
+
+    def __post_init__(self) -> None:
+        self.temp_mean = float(self.temp.mean())
+
+    @classmethod
+    def from_dataframe(cls, sheet: pd.DataFrame) -> "SheetData":
+        """Extracts the columns from a loaded sheet, removing rows with invalid weights and readings.
+
+        Args:
+            sheet (pd.DataFrame): The sheet with "Weight", "Raw" and "Temp" columns.
+
+        Returns:
+            SheetData: The extracted arrays.
+        """
+        weight = sheet["Weight"].to_numpy(dtype=np.float64)
+        raw = sheet["Raw"].to_numpy(dtype=np.float64)
+        temp = sheet["Temp"].to_numpy(dtype=np.float64)
+        valid = ~(np.isnan(weight) | np.isnan(raw))
+        # Boolean indexing copies, so these are also contiguous
+        return cls(weight[valid], raw[valid], temp[valid])
+
+    def __len__(self) -> int:
+        return len(self.weight)
+
 
 class StrainRegConfig(StrainConfig):
-    def load_regs(self, reg: LinearRegression) -> None:
+    def load_regs(self, reg: LinearFit) -> None:
         """Calculates the calibration values from a single linear regression.
 
         Args:
-            regs (LinearRegression): The linear regression model.
+            regs (LinearFit): The linear regression model.
         """
         self.temp_coef = 0
         self.temp_offset = 0
-        self.strain_coef = GRAVITY * CRANK_LENGTH / reg.coef_[0][0]
-        self.strain_offset = reg.intercept_[0]
+        self.strain_coef = GRAVITY * CRANK_LENGTH / reg.gradient
+        self.strain_offset = reg.offset
+
+
+def join_sheets_by_weight(sheets: List[SheetData]) -> SheetData:
+    """Joins the sheets into one set of arrays.
+
+    Args:
+        sheets (List[SheetData]): The sheets to join.
+
+    Returns:
+        SheetData: The joined data.
+    """
+    return SheetData(
+        np.concatenate([sheet.weight for sheet in sheets]),
+        np.concatenate([sheet.raw for sheet in sheets]),
+        np.concatenate([sheet.temp for sheet in sheets]),
+    )
+
+
+def sheet_cache_path(file: str, sheet: str) -> str:
+    """Gets the path of the cached copy of a sheet.
+
+    The name is a hash of the spreadsheet's path and the sheet name, so each sheet only ever
+    has one cache file, which is overwritten when the spreadsheet changes.
+
+    Args:
+        file (str): The spreadsheet the sheet is in.
+        sheet (str): The name of the sheet.
+
+    Returns:
+        str: The path to the cache file.
+    """
+    key = f"{os.path.abspath(file)}|{sheet}"
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.pkl")
+
+
+def read_sheet_cache(cache: str, mtime: float) -> Union[SheetData, None]:
+    """Reads a cached sheet if it was made from the current version of the spreadsheet.
+
+    Args:
+        cache (str): The path to the cache file.
+        mtime (float): The modification time of the spreadsheet.
+
+    Returns:
+        Union[SheetData, None]: The cached sheet, or None if there isn't a valid one.
+    """
+    try:
+        with open(cache, "rb") as file:
+            cached = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if cached.get("mtime") != mtime:
+        return None
 
+    return SheetData(cached["weight"], cached["raw"], cached["temp"])
 
-def remove_nan(sheets: List[pd.DataFrame]) -> None:
-    """Removes rows with invalid weights and readings.
+
+def write_sheet_cache(cache: str, mtime: float, sheet: SheetData) -> None:
+    """Saves a cleaned sheet, replacing any older copy of the same sheet.
 
     Args:
-        sheets (List[pd.DataFrame]): _description_
+        cache (str): The path to the cache file.
+        mtime (float): The modification time of the spreadsheet.
+        sheet (SheetData): The sheet with invalid rows already removed.
     """
-    for s in sheets:
-        s.dropna(how="any", subset=["Weight", "Raw"], inplace=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache, "wb") as file:
+        pickle.dump(
+            {
+                "mtime": mtime,
+                "weight": sheet.weight,
+                "raw": sheet.raw,
+                "temp": sheet.temp,
+            },
+            file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
 
+def load_sheets(
+    file: str, sheet_args: Union[List[str], None], use_cache: bool = True
+) -> List[SheetData]:
+    """Loads sheets from the spreadsheet, using cached copies from previous runs if available.
 
-def join_sheets_by_weight(
-    sheets: List[pd.DataFrame], sheet_names: List[str]
-) -> pd.DataFrame:
-    sheets_grouped: List[pd.Datzrame] = []
-    for i, sheet in enumerate(sheets):
-        # sheet["Sheet"] = sheet_names[i]
-        sheets_grouped.append(sheet)  # .groupby("Weight").mean(True))
-        sheets_grouped[-1]["Sheet"] = sheet_names[i]
+    Parsing the workbook is slow, so it is only opened once (and only if a sheet isn't cached).
+    The cache holds the cleaned arrays (invalid rows already removed) as a pickle. Parquet
+    would need pyarrow or fastparquet, which aren't otherwise needed, and pickle stores the
+    numpy arrays exactly. These files are only written and read by this script on the same
+    machine, so unpickling them is fine.
 
-    concat = pd.concat(sheets_grouped)
-    return concat
+    Args:
+        file (str): The spreadsheet containing the calibration data.
+        sheet_args (Union[List[str], None]): The names of the sheets to load.
+        use_cache (bool, optional): Whether to read and write the cache. Defaults to True.
 
+    Returns:
+        List[SheetData]: The loaded sheets with invalid rows removed.
+    """
+    mtime = os.path.getmtime(file)
+    workbook = None
+    sheets = []
+    for sheet in none_empty_list(sheet_args):
+        cache = sheet_cache_path(file, sheet)
+        data = read_sheet_cache(cache, mtime) if use_cache else None
+        if data is None:
+            if workbook is None:
+                workbook = pd.ExcelFile(file, engine=EXCEL_ENGINE)
+            df = workbook.parse(sheet, usecols=SHEET_COLUMNS, dtype=SHEET_DTYPES)
+            data = SheetData.from_dataframe(df)
+            if use_cache:
+                write_sheet_cache(cache, mtime, data)
+        sheets.append(data)
+
+    if workbook is not None:
+        workbook.close()
 
-def load_sheets(file: str, sheet_args: Union[List[str], None]) -> List[pd.DataFrame]:
-    sheets = [pd.read_excel(file, sheet) for sheet in none_empty_list(sheet_args)]
-    remove_nan(sheets)
     return sheets
 
 
@@ -107,31 +265,114 @@ def convert_weight_units(weight: np.ndarray) -> np.ndarray:
     return weight
 
 
-def linear_regress_side(sheet: pd.DataFrame) -> LinearRegression:
-    """Performs linear regression for a particular sheet.
+def sheet_arrays(sheet: SheetData) -> Tuple[np.ndarray, np.ndarray]:
+    """Gets the weight and raw columns of a sheet for fitting.
+
+    Args:
+        sheet (SheetData): The sheet to get the data from.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The converted weights and raw readings.
+    """
+    return convert_weight_units(sheet.weight), sheet.raw
+
+
+@njit(cache=True, parallel=True)
+def fit_and_score(
+    weights: np.ndarray, raw: np.ndarray, bounds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fits a line to and scores each sheet in a single pass over its data.
 
     Args:
-        sheet (pd.DataFrame): The sheet to perform linear regression on.
+        weights (np.ndarray): The converted weights of all sheets joined together.
+        raw (np.ndarray): The raw readings of all sheets joined together.
+        bounds (np.ndarray): Sheet i is from bounds[i] up to (not including) bounds[i + 1].
 
     Returns:
-        LinearRegression: LinearRegression object.
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The gradient, offset and R^2 of each sheet.
     """
-    forces = (convert_weight_units(sheet["Weight"].values)).reshape(-1, 1)
-    return LinearRegression().fit(forces, sheet["Raw"].values.reshape(-1, 1))
+    count = len(bounds) - 1
+    gradients = np.empty(count)
+    offsets = np.empty(count)
+    r2s = np.empty(count)
+    for i in prange(count):
+        start = bounds[i]
+        n = bounds[i + 1] - start
+        if n == 0:
+            gradients[i] = np.nan
+            offsets[i] = np.nan
+            r2s[i] = np.nan
+            continue
+
+        # Sums relative to the first point so the large ADC readings don't cancel out
+        # when the sums are combined.
+        shift_x = weights[start]
+        shift_y = raw[start]
+        sum_x = 0.0
+        sum_y = 0.0
+        sum_xx = 0.0
+        sum_xy = 0.0
+        sum_yy = 0.0
+        for j in range(start, start + n):
+            x = weights[j] - shift_x
+            y = raw[j] - shift_y
+            sum_x += x
+            sum_y += y
+            sum_xx += x * x
+            sum_xy += x * y
+            sum_yy += y * y
+
+        # Closed form least squares for a single variable.
+        s_xx = sum_xx - sum_x * sum_x / n
+        s_xy = sum_xy - sum_x * sum_y / n
+        s_yy = sum_yy - sum_y * sum_y / n
+        gradient = s_xy / s_xx
+        gradients[i] = gradient
+        offsets[i] = shift_y + sum_y / n - gradient * (shift_x + sum_x / n)
+        if s_yy == 0:
+            # Every reading is the same, so the flat line fits perfectly. Same as sklearn's
+            # r2_score, which doesn't divide by zero here.
+            r2s[i] = 1.0
+        else:
+            r2s[i] = s_xy * s_xy / (s_xx * s_yy)
+
+    return gradients, offsets, r2s
+
+
+def linear_regress_many(
+    sheets: List[SheetData],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Performs linear regression on each sheet independently, all at once.
+
+    The sheets are concatenated and fitted by a single call to fit_and_score.
+
+    Args:
+        sheets (List[SheetData]): The sheets to perform linear regression on.
 
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The gradient, offset and R^2 for each sheet.
+    """
+    if len(sheets) == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
 
-def score_linear_regress(sheet: pd.DataFrame, reg: LinearRegression) -> float:
-    """Calculates the R^2 value for a model.
+    arrays = [sheet_arrays(s) for s in sheets]
+    bounds = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(weights) for weights, _ in arrays], out=bounds[1:])
+    weights = np.concatenate([weights for weights, _ in arrays])
+    raw = np.concatenate([raw for _, raw in arrays])
+    return fit_and_score(weights, raw, bounds)
+
+
+def linear_regress_sheets(sheets: List[SheetData]) -> List[LinearFit]:
+    """Performs linear regression on each sheet, so the results can be reused by each plot.
 
     Args:
-        sheet (pd.DataFrame): The sheet to compare the model to.
-        reg (LinearRegression): The model.
+        sheets (List[SheetData]): The sheets to perform linear regression on.
 
     Returns:
-        float: R^2 value (1 is perfect, 0 is bad).
+        List[LinearFit]: The line of best fit for each sheet.
     """
-    forces = (convert_weight_units(sheet["Weight"].values)).reshape(-1, 1)
-    return reg.score(forces, sheet["Raw"].values.reshape(-1, 1))
+    return [LinearFit(*fit) for fit in zip(*linear_regress_many(sheets))]
 
 
 def separate_scientific(num: float) -> Tuple[float, int]:
@@ -162,53 +403,88 @@ def format_scientific(num: float) -> str:
     return f"{mantissa:.2f} \\times 10^{{{exp}}}"
 
 
+def plot_marker_groups(
+    ax: Axes, xs: List[np.ndarray], ys: List[np.ndarray], labels: List[str]
+) -> List[Line2D]:
+    """Plots several groups of points, each as a single colour line with markers and no line.
+
+    Each group is one colour, so a Line2D is enough. These are drawn with matplotlib's fast
+    marker path rather than the per-point colours and sizes a scatter's collection supports.
+
+    Args:
+        ax (Axes): The axes to plot on.
+        xs (List[np.ndarray]): The x values of each group.
+        ys (List[np.ndarray]): The y values of each group.
+        labels (List[str]): The legend label for each group.
+
+    Returns:
+        List[Line2D]: The line for each group to use as legend handles. Group i is drawn in
+            colour f"C{i}".
+    """
+    return [
+        ax.plot(
+            x, y, linestyle="None", marker="o", color=f"C{i % 10}", label=label
+        )[0]
+        for i, (x, y, label) in enumerate(zip(xs, ys, labels))
+    ]
+
+
 def plot_side_calibration(
     row: List[Axes],
-    sheets: List[pd.DataFrame],
+    sheets: List[SheetData],
     sheet_names: List[str],
     side: Side,
     max_weight: float,
+    regs: Union[List[LinearFit], None] = None,
 ):
     # ax, lax = row
     ax = row
-    for i, sheet in enumerate(sheets):
-        # Perform linear regression
-        reg = linear_regress_side(sheet)
-        # reg_label = f"$f(x) = {reg.coef_[0][0]:.0f} x + {format_scientific(reg.intercept_[0])} , R^2={score_linear_regress(sheet, reg):.3f}$"
+    if regs is None:
+        regs = linear_regress_sheets(sheets)
+
+    # End points of the regression lines, the same for every sheet
+    x = np.array([0, convert_weight_units(max_weight)])
+    all_weights = []
+    all_raw = []
+    labels = []
+    for i, (sheet, reg) in enumerate(zip(sheets, regs)):
+        weights, raw = sheet_arrays(sheet)
+        r2 = reg.r2
+        # reg_label = f"$f(x) = {reg.gradient:.0f} x + {format_scientific(reg.offset)} , R^2={r2:.3f}$"
         reg_label = None
         # Plot the raw data
         # Date
-        # label = f"{get_average_temp(sheet):.1f}°C measured ({sheet_names[i][6:8]}/{sheet_names[i][4:6]}/{sheet_names[i][0:4]})"
+        # label = f"{sheet.temp_mean:.1f}°C measured ({sheet_names[i][6:8]}/{sheet_names[i][4:6]}/{sheet_names[i][0:4]})"
         # Temperature only
-        label = f"${get_average_temp(sheet):.1f}^\circ C$, $R^2={score_linear_regress(sheet, reg):.3f}$"
+        labels.append(f"${sheet.temp_mean:.1f}^\circ C$, $R^2={r2:.3f}$")
+        all_weights.append(weights)
+        all_raw.append(raw)
 
-        ax.scatter(
-            convert_weight_units(sheet["Weight"].values),
-            sheet["Raw"].values,
-            label=label,
-        )
+        # Display the results of the linear regression
+        y = reg.gradient * x + reg.offset
+        ax.plot(x, y, ":", color=f"C{i % 10}", label=reg_label)
 
-        # Perform linear regression and display the results
-        x = np.array([0, convert_weight_units(max_weight)])
-        y = reg.predict(x.reshape(-1, 1))
-        ax.plot(x, y, ":", label=reg_label)
+    # All the raw data in one go
+    handles = plot_marker_groups(ax, all_weights, all_raw, labels)
 
     ax.set_ylabel("Reading from ADC")
     ax.set_title(f"{side.value.title()} side")
 
     # Set the legend on the right with its own axis
-    ax.legend()
+    ax.legend(handles=handles)
     # h, l = ax.get_legend_handles_labels()
     # lax.legend(h, l, borderaxespad=0, frameon=False)
     # lax.axis("off")
 
 
 def plot_calibration(
-    left_sheets: List[pd.DataFrame],
+    left_sheets: List[SheetData],
     left_sheet_names: List[str],
-    right_sheets: List[pd.DataFrame],
+    right_sheets: List[SheetData],
     right_sheet_names: List[str],
     max_weight: float,
+    left_regs: Union[List[LinearFit], None] = None,
+    right_regs: Union[List[LinearFit], None] = None,
 ) -> None:
     fig = plt.figure(figsize=[7.1111111, 4])
     # fig = plt.figure()
@@ -225,10 +501,10 @@ def plot_calibration(
     ax_right = row_right
 
     plot_side_calibration(
-        row_left, left_sheets, left_sheet_names, Side.LEFT, max_weight
+        row_left, left_sheets, left_sheet_names, Side.LEFT, max_weight, left_regs
     )
     plot_side_calibration(
-        row_right, right_sheets, right_sheet_names, Side.RIGHT, max_weight
+        row_right, right_sheets, right_sheet_names, Side.RIGHT, max_weight, right_regs
     )
 
     # ax_right.set_xlabel("Torque applied [Nm]")
@@ -240,27 +516,40 @@ def plot_calibration(
 
 
 def plot_raw_vs_temp_side(
-    ax: Axes, sheets: List[pd.DataFrame], sheet_names: List[str], side: Side
+    ax: Axes, sheets: List[SheetData], sheet_names: List[str], side: Side
 ):
-    joined = join_sheets_by_weight(sheets, sheet_names)
-    for weight in joined["Weight"].unique():
-        print(weight)
-        # print(weight)
-        selection = joined["Weight"] == weight
-        if sum(selection) > 4:
-            temps = joined[selection]["Temp"].values
-            readings = joined[selection]["Raw"].values
-            ax.scatter(temps, readings, label=f"{weight}kg")
+    joined = join_sheets_by_weight(sheets)
+    # Sort the rows by weight once so that each weight is a contiguous slice.
+    order = np.argsort(joined.weight, kind="stable")
+    temps = joined.temp[order]
+    readings = joined.raw[order]
+    weights, starts, counts = np.unique(
+        joined.weight[order], return_index=True, return_counts=True
+    )
+
+    # Plot in the order each weight first appears to match the sheets (the sort is
+    # stable, so the start of each slice is the first time that weight appears).
+    group_temps = []
+    group_readings = []
+    labels = []
+    for i in np.argsort(order[starts]):
+        if counts[i] > 4:
+            group = slice(starts[i], starts[i] + counts[i])
+            group_temps.append(temps[group])
+            group_readings.append(readings[group])
+            labels.append(f"{weights[i]}kg")
+
+    handles = plot_marker_groups(ax, group_temps, group_readings, labels)
 
     ax.set_ylabel("Reading from ADC")
     ax.set_title(f"{side.value.title()} side")
-    ax.legend()
+    ax.legend(handles=handles)
 
 
 def plot_raw_vs_temp(
-    left_sheets: List[pd.DataFrame],
+    left_sheets: List[SheetData],
     left_sheet_names: List[str],
-    right_sheets: List[pd.DataFrame],
+    right_sheets: List[SheetData],
     right_sheet_names: List[str],
 ) -> None:
     fig = plt.figure()
@@ -276,21 +565,18 @@ def plot_raw_vs_temp(
     plt.show()
 
 
-def get_average_temp(sheet: pd.DataFrame) -> float:
-    """Gets the average temperature of a sheet.
-
-    Args:
-        sheet (pd.DataFrame): The sheet to find the average temperature of.
-
-    Returns:
-        float: The average temperature.
-    """
-    return sheet["Temp"].values.mean()
-
+def plot_coefs_vs_temp(
+    sheets: List[SheetData],
+    sheet_names: List[str],
+    side: Side,
+    regs: Union[List[LinearFit], None] = None,
+):
+    if regs is None:
+        regs = linear_regress_sheets(sheets)
 
-def plot_coefs_vs_temp(sheets: List[pd.DataFrame], sheet_names: List[str], side: Side):
-    regs = [linear_regress_side(s) for s in sheets]
-    temps = [get_average_temp(s) for s in sheets]
+    gradients = [r.gradient for r in regs]
+    offsets = [r.offset for r in regs]
+    temps = [s.temp_mean for s in sheets]
 
     fig = plt.figure()
     gs = fig.add_gridspec(2, height_ratios=[1, 1])
@@ -299,15 +585,15 @@ def plot_coefs_vs_temp(sheets: List[pd.DataFrame], sheet_names: List[str], side:
     ax_c: Axes
 
     plt.title(f"{side.value.title()} side calibration constants vs temperature")
-    ax_m.scatter(temps, [r.coef_[0][0] for r in regs])
+    ax_m.scatter(temps, gradients)
     ax_m.set_ylabel("Gradient [raw/N]")
     ax_m.set_title("Gradient")
-    ax_c.scatter(temps, [r.intercept_[0] for r in regs])
+    ax_c.scatter(temps, offsets)
     ax_c.set_ylabel("Offset [raw]")
     ax_c.set_title("Offset")
     ax_c.set_xlabel("Temperature [°C]")
 
-def write_cal_file(input_file:Union[str, None], output_file:str, left_reg:LinearRegression, right_reg:LinearRegression) -> None:
+def write_cal_file(input_file:Union[str, None], output_file:str, left_reg:LinearFit, right_reg:LinearFit) -> None:
     """Writes a calibration file.
 
     Args:
@@ -368,6 +654,11 @@ if __name__ == "__main__":
         default=50,
         type=float,
     )
+    parser.add_argument(
+        "--no-cache",
+        help="If present, always parses the spreadsheet and does not read or write cached sheets.",
+        action="store_true",
+    )
     cal_data_args = parser.add_argument_group(
         "Loading and saving calibration data",
         "If provided, a json file will be generated with configuration values."
@@ -388,19 +679,31 @@ if __name__ == "__main__":
     args = parser.parse_args()
     # pd.read_excel(args.input, sheet_name=
     left_sheet_names = none_empty_list(args.left)
-    left_sheets = load_sheets(args.input, left_sheet_names)
     right_sheet_names = none_empty_list(args.right)
-    right_sheets = load_sheets(args.input, args.right)
+    # Load both sides together so the workbook is opened at most once
+    sheets = load_sheets(
+        args.input, left_sheet_names + right_sheet_names, not args.no_cache
+    )
+    left_sheets = sheets[: len(left_sheet_names)]
+    right_sheets = sheets[len(left_sheet_names) :]
+
+    # Fit every sheet once and share the results between the plots and the config file
+    left_regs = linear_regress_sheets(left_sheets)
+    right_regs = linear_regress_sheets(right_sheets)
     plot_calibration(
-        left_sheets, left_sheet_names, right_sheets, right_sheet_names, args.max_weight
+        left_sheets,
+        left_sheet_names,
+        right_sheets,
+        right_sheet_names,
+        args.max_weight,
+        left_regs,
+        right_regs,
     )
     # plot_raw_vs_temp(left_sheets, left_sheet_names, right_sheets, right_sheet_names)
-    plot_coefs_vs_temp(left_sheets, left_sheet_names, Side.LEFT)
-    # plot_coefs_vs_temp(right_sheets, right_sheet_names, Side.RIGHT)
+    plot_coefs_vs_temp(left_sheets, left_sheet_names, Side.LEFT, left_regs)
+    # plot_coefs_vs_temp(right_sheets, right_sheet_names, Side.RIGHT, right_regs)
 
     if args.cal_out is not None:
-        left_reg = linear_regress_side(left_sheets[0])
-        right_reg = linear_regress_side(right_sheets[0])
-        write_cal_file(args.cal_in, args.cal_out, left_reg, right_reg)
+        write_cal_file(args.cal_in, args.cal_out, left_regs[0], right_regs[0])
 
     plt.show()
@@ -8,16 +8,27 @@ from typing import Union, List
 from abc import ABC, abstractmethod
 from enum import Enum
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 from matplotlib.lines import Line2D
-from multiprocessing import Queue
-from typing import TypeVar, Tuple
-from dataclasses import dataclass
+from collections import deque
+from typing import TypeVar, Tuple, NamedTuple
 import struct
 import json
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba isn't installed, so run the decorated functions as plain python.
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+
 T = TypeVar("U")
 
 
@@ -66,43 +77,104 @@ def add_time_args(
     return time_group
 
 
-def convert_to_unix_time(df: pd.DataFrame) -> None:
+@njit(cache=True)
+def sorted_unix_time(unix: np.ndarray, device: np.ndarray) -> np.ndarray:
+    """Calculates the time of each record in a single pass. This is the same as
+    convert_to_unix_time, but only works if the unix timestamps are in order.
+
+    Args:
+        unix (np.ndarray): Unix timestamps the messages were received at (sorted).
+        device (np.ndarray): Device timestamps in seconds.
+
+    Returns:
+        np.ndarray: The calculated time of each record.
+    """
+    result = np.empty(len(unix))
+    step_offset = 0.0
+    last_offset = -np.inf
+    for i in range(len(unix)):
+        if i == 0 or unix[i] != unix[i - 1]:
+            # First record in a new batch. Check if the device was reset.
+            offset = unix[i] - device[i]
+            if offset - last_offset > 10:
+                step_offset = offset
+            last_offset = offset
+
+        result[i] = device[i] + step_offset
+
+    return result
+
+
+def convert_to_unix_time(
+    df: pd.DataFrame, column: str = "Calculated Time [s]"
+) -> None:
     """Correctly assigns a unix timestamp to each record based off the unix timestamp when the first message was received and the device timestamp.
 
     This correctly handles the device being reset / overflow.
 
     Args:
-        df (pd.DataFrame): The dataframe containing "Unix Timestamp [s]" and "Device Timestamp [us]" columns. A column "Calculated Time [s]" will be created with the result.
+        df (pd.DataFrame): The dataframe containing "Unix Timestamp [s]" and "Device Timestamp [us]" columns.
+        column (str, optional): The column to create with the result. Defaults to "Calculated Time [s]".
     """
-    # Calculate the offsets between units.
-    first_in_batch = df.groupby("Unix Timestamp [s]").first()
-    offsets = first_in_batch.index - first_in_batch["Device Timestamp [us]"] * 1e-6
+    unix = df["Unix Timestamp [s]"].values
+    device = df["Device Timestamp [us]"].values * 1e-6
+    if df["Unix Timestamp [s]"].is_monotonic_increasing:
+        # Normal case, can be done in one pass.
+        df[column] = sorted_unix_time(unix.astype(np.float64), device.astype(np.float64))
+        return
+
+    # Calculate the offsets between units using the first record in each batch.
+    batch_times, first_in_batch = np.unique(unix, return_index=True)
+    offsets = batch_times - device[first_in_batch]
 
     # Work out times that were reset.
-    steps = np.diff(offsets.values, prepend=[-np.inf])
-    step_starts = first_in_batch[(steps > 10)]
-
-    # Apply the offset for each step start
-    for i in range(len(step_starts)):
-        # Calculate the time range to apply and the offset
-        start_time = step_starts.iloc[i].name
-        offset = start_time - step_starts.iloc[i]["Device Timestamp [us]"] * 1e-6
-
-        # Apply the offset
-        if i < len(step_starts) - 1:
-            # Apply to the next restart
-            stop_time = step_starts.iloc[i + 1].name
-            selection = (df["Unix Timestamp [s]"] >= start_time) & (
-                df["Unix Timestamp [s]"] < stop_time
-            )
-        else:
-            # Apply to the end of the data.
-            selection = df["Unix Timestamp [s]"] >= start_time
+    steps = np.diff(offsets, prepend=[-np.inf])
+    step_starts = np.flatnonzero(steps > 10)
+
+    # Work out which step each row belongs to (the last step start at or before it) and
+    # apply that step's offset to every row at once.
+    boundaries = batch_times[step_starts]
+    step_offsets = offsets[step_starts]
+    step = np.searchsorted(boundaries, unix, side="right") - 1
+    df[column] = device + step_offsets[step]
+
+
+def time_selection(
+    times: np.ndarray,
+    is_sorted: bool,
+    start_time: Union[float, None],
+    stop_time: Union[float, None],
+) -> Union[slice, np.ndarray]:
+    """Works out which rows are within the given time range.
+
+    Args:
+        times (np.ndarray): The times of each row.
+        is_sorted (bool): Whether times is in increasing order.
+        start_time (Union[float, None]): Start time.
+        stop_time (Union[float, None]): Stop time.
 
-        # Apply
-        df.loc[selection, "Calculated Time [s]"] = (
-            df[selection]["Device Timestamp [us]"] * 1e-6 + offset
+    Returns:
+        Union[slice, np.ndarray]: A slice (if sorted) or boolean mask that can be given to iloc.
+    """
+    if is_sorted:
+        # Logs are normally in order, so binary search for the ends and slice.
+        start = 0 if start_time is None else np.searchsorted(times, start_time)
+        stop = (
+            len(times)
+            if stop_time is None
+            else np.searchsorted(times, stop_time, side="right")
         )
+        return slice(start, stop)
+
+    # Otherwise build a single mask from the raw values.
+    mask = np.ones(len(times), dtype=bool)
+    if start_time is not None:
+        mask &= times >= start_time
+
+    if stop_time is not None:
+        mask &= times <= stop_time
+
+    return mask
 
 
 def truncate_times(
@@ -118,13 +190,15 @@ def truncate_times(
     Returns:
         pd.DataFrame: Adjusted dataframe.
     """
-    if start_time is not None:
-        df = df.drop(df[df["Unix Timestamp [s]"] < start_time].index)
-
-    if stop_time is not None:
-        df = df.drop(df[df["Unix Timestamp [s]"] > stop_time].index)
+    if start_time is None and stop_time is None:
+        return df
 
-    return df
+    times = df["Unix Timestamp [s]"]
+    return df.iloc[
+        time_selection(
+            times.to_numpy(), times.is_monotonic_increasing, start_time, stop_time
+        )
+    ]
 
 
 def apply_time_args(df: pd.DataFrame, args: argparse.Namespace) -> pd.DataFrame:
@@ -137,8 +211,14 @@ def apply_time_args(df: pd.DataFrame, args: argparse.Namespace) -> pd.DataFrame:
     Returns:
         pd.DataFrame: _description_
     """
-    df["Unix Timestamp [s]"] += args.global_offset - df["Unix Timestamp [s]"][0]
-    df = truncate_times(df, args.start, args.stop)
+    # Shift the times and filter in one go, only writing the times that are kept.
+    column = df["Unix Timestamp [s]"]
+    times = column.to_numpy() + (args.global_offset - column.iat[0])
+    selection = time_selection(
+        times, column.is_monotonic_increasing, args.start, args.stop
+    )
+    df = df.iloc[selection].copy()
+    df["Unix Timestamp [s]"] = times[selection]
     return df
 
 
@@ -152,25 +232,29 @@ def apply_device_time_corrections(df: pd.DataFrame, args: argparse.Namespace) ->
     # Convert the times to nicer units.
     if args.device_time:
         # Correct for the device being reset.
-        convert_to_unix_time(df)
-        df["Time"] = df["Calculated Time [s]"]
+        convert_to_unix_time(df, "Time")
     else:
         # No corrections, naively use device time (could be reset to 0).
-        df["Time"] = df["Device Timestamp [us]"] * 1e-6
+        df["Time"] = df["Device Timestamp [us]"].to_numpy(np.float64) * 1e-6
+
+
+# Multiply angular velocity in rad/s by this to get RPM.
+RPM_PER_RAD_S = 60 / (2 * np.pi)
 
 
 def velocity_to_cadence(av: float) -> float:
     """Converts the angular velocity to cadence.
 
+    As the conversion factor is a plain python float, float32 arrays (such as
+    live data straight from the power meter) stay as float32.
+
     Args:
         av (float): The angular velocity in radians per second.
 
     Returns:
         float: Cadence in RPM.
     """
-    rad_per_min = av * 60
-    rpm = rad_per_min / (2 * np.pi)
-    return rpm
+    return av * RPM_PER_RAD_S
 
 
 class Side(Enum):
@@ -178,16 +262,60 @@ class Side(Enum):
     RIGHT = "right"
 
 
+# Binary layouts of the IMU and strain records sent over MQTT. These let a
+# whole message be decoded in one go using np.frombuffer.
+IMU_DTYPE = np.dtype(
+    [
+        ("timestamp", "<u4"),
+        ("velocity", "<f4"),
+        ("position", "<f4"),
+        ("accel_x", "<f4"),
+        ("accel_y", "<f4"),
+        ("accel_z", "<f4"),
+        ("gyro_x", "<f4"),
+        ("gyro_y", "<f4"),
+        ("gyro_z", "<f4"),
+    ]
+)
+STRAIN_DTYPE = np.dtype(
+    [
+        ("timestamp", "<u4"),
+        ("velocity", "<f4"),
+        ("position", "<f4"),
+        ("raw", "<u4"),
+        ("torque", "<f4"),
+        ("power", "<f4"),
+        ("transmitting", "?"),
+    ]
+)
+
+# Precompiled versions of the above for decoding a single record.
+_IMU_STRUCT = struct.Struct("<Lffffffff")
+_STRAIN_STRUCT = struct.Struct("<LffLff?")
+
+
 class IMUData:
     """Class for storing and processing data from the IMU."""
 
     SIZE = 36
+    __slots__ = (
+        "timestamp",
+        "velocity",
+        "position",
+        "accel_x",
+        "accel_y",
+        "accel_z",
+        "gyro_x",
+        "gyro_y",
+        "gyro_z",
+    )
 
-    def __init__(self, data: bytes) -> None:
+    def __init__(self, data: bytes, offset: int = 0) -> None:
         """Initialises the object.
 
         Args:
-            data (bytes): The raw data (trimmed to just that containing this object).
+            data (bytes): The raw data containing this object.
+            offset (int, optional): Where this object starts in data. Defaults to 0.
         """
         (
             self.timestamp,
@@ -199,7 +327,7 @@ class IMUData:
             self.gyro_x,
             self.gyro_y,
             self.gyro_z,
-        ) = struct.unpack("<Lffffffff", data)
+        ) = _IMU_STRUCT.unpack_from(data, offset)
 
     def cadence(self) -> float:
         """Calculates the current cadence from the velocity.
@@ -207,7 +335,7 @@ class IMUData:
         Returns:
             float: The cadence in RPM.
         """
-        return abs(self.velocity) / (2 * np.pi) * 60
+        return velocity_to_cadence(abs(self.velocity))
 
     def __str__(self) -> str:
         return f"{self.timestamp:>10d}: {self.velocity:>8.2f}rad/s {self.position:>8.1f}rad [{self.accel_x:>8.2f}, {self.accel_y:>8.2f}, {self.accel_z:>8.2f}]m/s [{self.gyro_x:>8.2f}, {self.gyro_y:>8.2f}, {self.gyro_z:>8.2f}]rad/s"
@@ -217,12 +345,22 @@ class StrainData:
     """Class for storing and processing data from a strain gauge"""
 
     SIZE = 25
+    __slots__ = (
+        "timestamp",
+        "velocity",
+        "position",
+        "raw",
+        "torque",
+        "power",
+        "transmitting",
+    )
 
-    def __init__(self, data: bytes) -> None:
+    def __init__(self, data: bytes, offset: int = 0) -> None:
         """Initialises the object.
 
         Args:
-            data (bytes): The raw data (trimmed to just that containing this object).
+            data (bytes): The raw data containing this object.
+            offset (int, optional): Where this object starts in data. Defaults to 0.
         """
         (
             self.timestamp,
@@ -232,12 +370,97 @@ class StrainData:
             self.torque,
             self.power,
             self.transmitting
-        ) = struct.unpack("<LffLff?", data)
+        ) = _STRAIN_STRUCT.unpack_from(data, offset)
 
     def __str__(self) -> str:
         return f"{self.timestamp:>10d}: {self.velocity:>8.2f}rad/s {self.position:>8.1f}rad {self.raw:>11d}raw {self.torque:>8.2f}Nm {self.power:>8.2f}W {'Currently' if self.transmitting else 'Not'} transmitting."
 
 
+class RingBuffer:
+    """Preallocated circular buffer of numbers for live charts.
+
+    When bounded, everything is written twice (to both halves of an array twice
+    the length), so the points from oldest to newest are always one contiguous
+    slice and can be given to matplotlib without copying.
+    """
+
+    def __init__(self, max_length: Union[int, None], dtype=np.float32) -> None:
+        """Initialises the buffer.
+
+        Args:
+            max_length (Union[int, None]): The maximum number of points to keep. If 0 or None, keeps everything (the buffer grows as needed).
+            dtype (optional): The numpy type to store. Defaults to np.float32.
+        """
+        self.bounded = bool(max_length)
+        self.capacity = max_length if self.bounded else 1024
+        self.data = np.empty(
+            2 * self.capacity if self.bounded else self.capacity, dtype=dtype
+        )
+        self.length = 0  # Number of valid points.
+        self.head = 0  # Where the next point will be written.
+
+    def __len__(self) -> int:
+        return self.length
+
+    def extend(self, values: np.ndarray) -> None:
+        """Adds points to the end of the buffer, overwriting the oldest if full.
+
+        Args:
+            values (np.ndarray): The points to add.
+        """
+        values = np.asarray(values)
+        count = len(values)
+        capacity = self.capacity
+        if not self.bounded:
+            # Grow like a list would so appending stays cheap on average.
+            if self.length + count > capacity:
+                self.capacity = max(2 * capacity, self.length + count)
+                new_data = np.empty(self.capacity, dtype=self.data.dtype)
+                new_data[: self.length] = self.data[: self.length]
+                self.data = new_data
+            self.data[self.length : self.length + count] = values
+            self.length += count
+            self.head = self.length
+            return
+
+        if count >= capacity:
+            # Only the newest values will fit.
+            self.data[:capacity] = values[count - capacity :]
+            self.data[capacity:] = values[count - capacity :]
+            self.head = 0
+            self.length = capacity
+            return
+
+        # Write in up to two pieces, wrapping around the end, into both halves.
+        first = min(count, capacity - self.head)
+        rest = count - first
+        self.data[self.head : self.head + first] = values[:first]
+        self.data[capacity + self.head : capacity + self.head + first] = values[:first]
+        self.data[:rest] = values[first:]
+        self.data[capacity : capacity + rest] = values[first:]
+        self.head = (self.head + count) % capacity
+        self.length = min(self.length + count, capacity)
+
+    def view(self) -> np.ndarray:
+        """Returns the points from oldest to newest.
+
+        Returns:
+            np.ndarray: A view of the buffer, so copy it if it needs to be kept.
+        """
+        if self.length < self.capacity:
+            return self.data[: self.length]
+        else:
+            return self.data[self.head : self.head + self.length]
+
+    def latest(self) -> float:
+        """Returns the most recently added point."""
+        return self.data[self.head - 1]
+
+
+# Minimum time between redraws of the live charts in ms.
+REDRAW_INTERVAL = 80
+
+
 class LiveChart(ABC):
     def __init__(
         self, fig: Figure, ax: Axes, max_history: int = None, title: str = ""
@@ -254,58 +477,92 @@ class LiveChart(ABC):
         ax.set_title("")
         fig.tight_layout()
         self.fig, self.ax = fig, ax
-        # Start the process to show the graph.
-        self.queue = Queue()
-        self.title_queue = Queue()
+        # Animated artists that get blitted each frame. Set by the child class.
+        self.artists: Tuple[Line2D] = ()
+        # Queues to pass data from the MQTT thread to the GUI thread. Appending
+        # and popping are atomic, so no locks are needed. If the GUI stalls,
+        # the oldest data is dropped rather than building up forever. Only the
+        # newest title matters.
+        self.queue = deque(maxlen=256)
+        self.title_queue = deque(maxlen=1)
+
+    @abstractmethod
+    def store(self, data: T) -> None:
+        """Adds data to the chart without redrawing it.
+
+        Args:
+            data (T): The data to add (or list of data points).
+        """
+        pass
 
     @abstractmethod
+    def draw(self) -> Tuple[Line2D]:
+        """Updates the lines with the stored data.
+
+        Returns:
+            Tuple[Line2D]: The artists that need to be drawn.
+        """
+        pass
+
     def update(self, data: T) -> Tuple[Line2D]:
         """Updates the graph.
 
         Args:
             data (T): The data to add (or list of data points).
         """
-        pass
+        self.store(data)
+        return self.draw()
 
     def add_data(self, data: T) -> None:
         """Adds data to be passed to the update method eventually."""
-        self.queue.put(data)
+        self.queue.append(data)
 
     def setup_animation(self) -> None:
-        self.ani = animation.FuncAnimation(
-            fig=self.fig, func=self.update_graph, interval=80, cache_frame_data=False
-        )
-
-    def update_graph(self, frame: int) -> Tuple[Line2D]:
-        """Gets the latest data from the queue and calls update"""
+        """Starts a timer that redraws the lines whenever new data has arrived."""
+        self.background = None
+        self.fig.canvas.mpl_connect("draw_event", self.on_draw)
+        self.timer = self.fig.canvas.new_timer(interval=REDRAW_INTERVAL)
+        self.timer.add_callback(self.update_graph)
+        self.timer.start()
+
+    def on_draw(self, event) -> None:
+        """Saves the background after a full redraw (the lines are animated, so
+        aren't part of it) and draws the lines back on top."""
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def update_graph(self) -> None:
+        """Stores all data waiting in the queue and redraws the lines."""
         # Update the title as needed
-        if not self.title_queue.empty():
-            self.ax.set_title(self.title_queue.get())
-
-        # Update the lines
-        if not self.queue.empty():
-            data = self.queue.get()
-            return self.update(data)
-        else:
-            return None
-
-    def limit_length(self, input: list) -> list:
-        """Limits the length of a list to the given max history.
-
-        Args:
-            input (list): The input data.
-
-        Returns:
-            list: The latest with old data removed.
-        """
-        if self.max_history and len(input) > self.max_history:
-            return input[len(input) - self.max_history :]
-        else:
-            return input
+        if self.title_queue:
+            self.ax.set_title(self.title_queue.popleft())
+            # The title isn't blitted, so a full redraw is needed to show it.
+            self.fig.canvas.draw_idle()
+
+        # Nothing to do if no new data has arrived.
+        if not self.queue:
+            return
+
+        # Take everything that arrived since the last frame so the graph
+        # doesn't fall behind when data comes in quickly.
+        while self.queue:
+            self.store(self.queue.popleft())
+        self.draw()
+
+        # Blit only the lines over the saved background rather than redrawing
+        # the whole polar grid. Wait for the first full draw if needed.
+        if self.background is not None:
+            canvas = self.fig.canvas
+            canvas.restore_region(self.background)
+            for artist in self.artists:
+                self.fig.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
 
     def update_title(self, new_title: str) -> None:
         """Adds the new title to the queue."""
-        self.title_queue.put(new_title)
+        self.title_queue.append(new_title)
 
 
 class PolarLiveChart(LiveChart):
@@ -324,7 +581,7 @@ class PolarLiveChart(LiveChart):
         # fig, ax = plt.subplots()
         # ax.set_ylim(0, ymax)
         if show_current_angle:
-            self.latest = ax.axvline(0, color="r")
+            self.latest = ax.axvline(0, color="r", animated=True)
         super().__init__(fig, ax, max_history, title)
 
 
@@ -338,29 +595,26 @@ class IMULiveChart(PolarLiveChart):
         initial_cadence: np.ndarray = [],
         show_current_angle: bool = True,
     ):
-        self.theta = []
-        self.cadence = []
+        self.theta = RingBuffer(max_history)
+        self.cadence = RingBuffer(max_history)
         super().__init__(
             max_history,
             "Cadence [rpm] vs pedal angle [$^\circ$]",
             160,
             show_current_angle,
         )
-        self.line = self.ax.plot(initial_theta, initial_cadence)[0]
-
-    def update(self, converted: T) -> Tuple[Line2D]:
-        for conv in converted:
-            self.theta.append(conv.position)
-            self.cadence.append(conv.cadence())
+        self.line = self.ax.plot(initial_theta, initial_cadence, animated=True)[0]
+        self.artists = (self.line, self.latest)
 
-        # Remove old data
-        self.cadence = self.limit_length(self.cadence)
-        self.theta = self.limit_length(self.theta)
+    def store(self, converted: T) -> None:
+        self.theta.extend(converted["position"])
+        cadence = np.abs(converted["velocity"])
+        cadence *= RPM_PER_RAD_S
+        self.cadence.extend(cadence)
 
-        # Update the data
-        self.line.set_xdata(self.theta)
-        self.line.set_ydata(self.cadence)
-        self.latest.set_xdata([self.theta[-1]])
+    def draw(self) -> Tuple[Line2D]:
+        self.line.set_data(self.theta.view(), self.cadence.view())
+        self.latest.set_xdata([self.theta.latest()])
 
         return self.line, self.latest
 
@@ -368,10 +622,9 @@ class IMULiveChart(PolarLiveChart):
         self.update_title(f"Currently ${cadence:>.1f}$ rpm average")
 
 
-@dataclass
-class SideDataPair:
+class SideDataPair(NamedTuple):
     side: Side
-    data: List[StrainData]
+    data: np.ndarray
 
 
 class TorqueLiveChart(PolarLiveChart):
@@ -386,45 +639,52 @@ class TorqueLiveChart(PolarLiveChart):
         initial_right_torque: np.ndarray = [],
         show_current_angle: bool = True,
     ):
-        # Lists to hold data
-        self.thetas = {Side.LEFT: [], Side.RIGHT: []}
-        self.torques = {Side.LEFT: [], Side.RIGHT: []}
+        # Ring buffers to hold data
+        self.thetas = {
+            Side.LEFT: RingBuffer(max_history),
+            Side.RIGHT: RingBuffer(max_history),
+        }
+        self.torques = {
+            Side.LEFT: RingBuffer(max_history),
+            Side.RIGHT: RingBuffer(max_history),
+        }
 
         # Initialise the graph.
         super().__init__(
             max_history, "Torque [Nm] vs pedal angle [$^\circ$]", 80, show_current_angle
         )
         self.lines = {
-            Side.LEFT: self.ax.plot(initial_left_theta, initial_left_torque)[0],
-            Side.RIGHT: self.ax.plot(initial_right_theta, initial_right_torque)[0],
+            Side.LEFT: self.ax.plot(
+                initial_left_theta, initial_left_torque, animated=True
+            )[0],
+            Side.RIGHT: self.ax.plot(
+                initial_right_theta, initial_right_torque, animated=True
+            )[0],
         }
+        self.artists = (self.lines[Side.LEFT], self.lines[Side.RIGHT], self.latest)
         # self.points = {
         #     Side.LEFT: self.ax.plot([], [], marker=".", markersize=10)[0],
         #     Side.RIGHT: self.ax.plot([], [], marker=".", markersize=10)[0]
         # }
 
-    def update(self, converted: T) -> Tuple[Line2D]:
+    def store(self, converted: T) -> None:
         # Extract the data
         side: Side = converted.side
-        data: List[StrainData] = converted.data
+        data: np.ndarray = converted.data
 
         # Append to list.
-        theta_list = self.thetas[side]
-        torque_list = self.torques[side]
-        for conv in data:
-            theta_list.append(conv.position)
-            torque_list.append(conv.torque)
-
-        # Remove old data
-        self.thetas[side] = self.limit_length(self.thetas[side])
-        self.torques[side] = self.limit_length(self.torques[side])
-
-        # Update the data
-        self.lines[side].set_xdata(self.thetas[side])
-        self.lines[side].set_ydata(self.torques[side])
+        self.thetas[side].extend(data["position"])
+        self.torques[side].extend(data["torque"])
+        self.latest_side = side
+
+    def draw(self) -> Tuple[Line2D]:
+        for side in Side:
+            self.lines[side].set_data(
+                self.thetas[side].view(), self.torques[side].view()
+            )
         # self.points[side].set_xdata([self.thetas[side][-1]])
         # self.points[side].set_ydata([self.torques[side][-1]])
-        self.latest.set_xdata([self.thetas[side][-1]])
+        self.latest.set_xdata([self.thetas[self.latest_side].latest()])
 
         return self.lines[Side.LEFT], self.lines[Side.RIGHT], self.latest
         # return self.lines[Side.LEFT], self.lines[Side.RIGHT], self.latest, self.points[Side.LEFT], self.points[Side.RIGHT]
@@ -442,9 +702,15 @@ class PowerLiveChart(PolarLiveChart):
         initial_right_power: np.ndarray = [],
         show_current_angle: bool = True,
     ):
-        # Lists to hold data
-        self.thetas = {Side.LEFT: [], Side.RIGHT: []}
-        self.powers = {Side.LEFT: [], Side.RIGHT: []}
+        # Ring buffers to hold data
+        self.thetas = {
+            Side.LEFT: RingBuffer(max_history),
+            Side.RIGHT: RingBuffer(max_history),
+        }
+        self.powers = {
+            Side.LEFT: RingBuffer(max_history),
+            Side.RIGHT: RingBuffer(max_history),
+        }
 
         # Initialise the graph.
         super().__init__(
@@ -455,34 +721,29 @@ class PowerLiveChart(PolarLiveChart):
         )
         self.lines = {
             Side.LEFT: self.ax.plot(
-                initial_left_theta, initial_left_power, label="Left"
+                initial_left_theta, initial_left_power, label="Left", animated=True
             )[0],
             Side.RIGHT: self.ax.plot(
-                initial_right_theta, initial_right_power, label="Right"
+                initial_right_theta, initial_right_power, label="Right", animated=True
             )[0],
         }
+        self.artists = (self.lines[Side.LEFT], self.lines[Side.RIGHT], self.latest)
         self.ax.legend()
 
-    def update(self, converted: T) -> Tuple[Line2D]:
+    def store(self, converted: T) -> None:
         # Extract the data
         side: Side = converted.side
-        data: List[StrainData] = converted.data
+        data: np.ndarray = converted.data
 
         # Append to list.
-        theta_list = self.thetas[side]
-        power_list = self.powers[side]
-        for conv in data:
-            theta_list.append(conv.position)
-            power_list.append(conv.power)
-
-        # Remove old data
-        self.thetas[side] = self.limit_length(self.thetas[side])
-        self.powers[side] = self.limit_length(self.powers[side])
-
-        # Update the data
-        self.lines[side].set_xdata(self.thetas[side])
-        self.lines[side].set_ydata(self.powers[side])
-        self.latest.set_xdata([self.thetas[side][-1]])
+        self.thetas[side].extend(data["position"])
+        self.powers[side].extend(data["power"])
+        self.latest_side = side
+
+    def draw(self) -> Tuple[Line2D]:
+        for side in Side:
+            self.lines[side].set_data(self.thetas[side].view(), self.powers[side].view())
+        self.latest.set_xdata([self.thetas[self.latest_side].latest()])
 
         return self.lines[Side.LEFT], self.lines[Side.RIGHT], self.latest
 
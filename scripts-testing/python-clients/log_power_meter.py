@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """log_power_meter.py
-usage: log_power_meter.py [--help] [-h HOST] [-m {graph,csv,both}] [-r MAX_RECORDS] [-o OUTPUT] [--no-about] [--no-housekeeping] [--no-imu] [--no-left] [--no-right] [--no-power]
+usage: log_power_meter.py [--help] [-h HOST] [-m {graph,csv,both}] [-r MAX_RECORDS] [--graph-decimate GRAPH_DECIMATE] [-o OUTPUT] [-v] [--no-about] [--no-housekeeping] [--no-imu] [--no-left] [--no-right] [--no-power]
 
 Subscribes to MQTT data from the power meter, decodes it and saves the data to a file and or draws it on a live graph.
 
@@ -11,8 +11,11 @@ options:
                         The output method to use. (default: both)
   -r MAX_RECORDS, --max-records MAX_RECORDS
                         The maximum number of records to show at a time on the graph. Set as 0 to show everything (may slow down over time) (default: 250)
+  --graph-decimate GRAPH_DECIMATE
+                        Only graph every nth high speed record (the latest record in each message is always included). Must be at least 1. (default: 1)
   -o OUTPUT, --output OUTPUT
                         The folder to create and write CSV files into. (default: 20240927_194404_PowerMeter)
+  -v, --verbose         If present, prints every high speed record as it is saved. This is slow. (default: False)
 
 Topics to include:
   All topics are included by default, set these to False to not subscribe to a particular topic.
@@ -35,12 +38,22 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 import os
 import matplotlib.pyplot as plt
-from multiprocessing import Process
 import time
-import json
 import traceback
+import csv
+import atexit
+import queue
+import threading
+from itertools import repeat
+import numpy as np
 
-from common import IMUData, StrainData, Side, IMULiveChart, TorqueLiveChart, PowerLiveChart, SideDataPair
+try:
+    # orjson is a lot faster than the built in json module if it is installed.
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from common import IMUData, StrainData, IMU_DTYPE, STRAIN_DTYPE, Side, IMULiveChart, TorqueLiveChart, PowerLiveChart, SideDataPair
 
 # Topics
 MQTT_TOPIC_PREFIX = "/power/"
@@ -52,15 +65,58 @@ MQTT_TOPIC_IMU = MQTT_TOPIC_PREFIX + "imu"
 MQTT_TOPIC_LEFT = MQTT_TOPIC_HIGH_SPEED + Side.LEFT.value
 MQTT_TOPIC_RIGHT = MQTT_TOPIC_HIGH_SPEED + Side.RIGHT.value
 
+# Buffer size for the frequently written CSV files. About and housekeeping
+# messages are rare, so those files are line buffered instead.
+CSV_BUFFER_SIZE = 1 << 20
+# Minimum time between average prints for each side [s].
+PRINT_INTERVAL = 0.5
+# Most messages the writer thread handles before flushing the files.
+DRAIN_BATCH = 256
+# Minimum time between warnings about dropped messages [s].
+DROP_WARNING_INTERVAL = 5.0
+# How long the writer thread waits for messages before checking if it should stop [s].
+STOP_CHECK_INTERVAL = 0.5
+
+def decode_imu(data: bytes) -> np.ndarray:
+    """Accepts a blob of bytes and converterts these into a structured array of
+    IMU records.
+
+    Args:
+        data (bytes): The raw data (full MQTT message).
+
+    Returns:
+        np.ndarray: The records contained in the data, with fields as given in
+                    IMU_DTYPE.
+    """
+    # Decode every record in one go rather than one struct.unpack each.
+    return np.frombuffer(data, dtype=IMU_DTYPE)
+
+
+def decode_strain(data: bytes) -> np.ndarray:
+    """Accepts a blob of bytes and converterts these into a structured array of
+    strain records.
+
+    Args:
+        data (bytes): The raw data (full MQTT message).
+
+    Returns:
+        np.ndarray: The records contained in the data, with fields as given in
+                    STRAIN_DTYPE.
+    """
+    # Decode every record in one go rather than one struct.unpack each.
+    return np.frombuffer(data, dtype=STRAIN_DTYPE)
+
+
 class DataHandler(ABC):
     """Class for accepting and processing data from the power meter."""
 
     @abstractmethod
-    def add_imu(self, data: bytes) -> None:
-        """Takes in bytes containing the data from the IMU and handles them.
+    def add_imu(self, unix_time: float, data: np.ndarray) -> None:
+        """Takes in data from the IMU and handles it.
 
         Args:
-            data (bytes): The raw MQTT message containing IMU data.
+            unix_time (float): The time the message was received.
+            data (np.ndarray): The decoded IMU records (see decode_imu).
         """
         pass
 
@@ -73,112 +129,121 @@ class DataHandler(ABC):
         """
         pass
 
-    def add_housekeeping(self, unix_time: float, data: str) -> None:
+    def add_housekeeping(self, unix_time: float, data: dict) -> None:
         """Accepts housekeeping data and handles it.
 
         Args:
-            data (str): The MQTT message string containing the housekeeping data.
+            data (dict): The decoded JSON from the housekeeping message.
         """
         pass
 
-    def add_fast(self, unix_time: float, data: str, side: Side) -> None:
+    def add_fast(self, unix_time: float, data: np.ndarray, side: Side) -> None:
         """Accepts a message from a side and handles it.
 
         Args:
-            data (str): The MQTT message string containing the about message.
+            unix_time (float): The time the message was received.
+            data (np.ndarray): The decoded strain records (see decode_strain).
             side (Side): The side the data applies to.
         """
         pass
 
-    def add_slow(self, unix_time: float, data: str) -> None:
+    def add_slow(self, unix_time: float, data: dict) -> None:
         """Adds slow speed data (power, balance, cadence...)
 
         Args:
             unix_time (float): The time the message was received.
-            data (str): The data in the message.
+            data (dict): The decoded JSON from the message.
         """
         pass
 
+    def flush(self) -> None:
+        """Writes out anything buffered. Called regularly from the writer thread."""
+
     def close(self) -> None:
         """Closes the handler safely."""
 
-    def _process_imu(self, data: bytes) -> List[IMUData]:
-        """Accepts a blob of bytes and converterts these into an array of
-        IMUData objects.
-
-        Args:
-            data (bytes): The raw data (full MQTT message).
-
-        Returns:
-            List[IMUData]: A list of IMUData objects that were contained in the
-                           data.
-        """
-        # For each data object, extract it and add it to an array.
-        result = [
-            IMUData(data[i : i + IMUData.SIZE])
-            for i in range(0, len(data), IMUData.SIZE)
-        ]
-        return result
-
-    def _process_strain(self, data: bytes) -> List[StrainData]:
-        """Accepts a blob of bytes and converterts these into an array of
-        StrainData objects.
-
-        Args:
-            data (bytes): The raw data (full MQTT message).
-
-        Returns:
-            List[StrainData]: A list of StrainData objects that were contained
-            in the data.
-        """
-        # For each data object, extract it and add it to an array.
-        result = [
-            StrainData(data[i : i + StrainData.SIZE])
-            for i in range(0, len(data), StrainData.SIZE)
-        ]
-        return result
-
 
 class CSVSide:
-    def __init__(self, side: Side, output_dir: str):
+    def __init__(self, side: Side, output_dir: str, verbose: bool = False):
         """Opens a file ready to write with the given name.
 
         Args:
             side (Side): The side this will represent.
             output_dir (str): The output directory to place the file in.
+            verbose (bool, optional): Print every record. Defaults to False.
         """
         # Open the file and write a heading.
-        self.file = open(f"{output_dir}/{side.value}_strain.csv", "w")
+        self.file = open(
+            f"{output_dir}/{side.value}_strain.csv",
+            "w",
+            buffering=CSV_BUFFER_SIZE,
+            newline="",
+        )
         self.file.write(
             "Unix Timestamp [s],Device Timestamp [us],Timestep[us],Velocity [rad/s],Position [rad],Raw [uint24],Torque [Nm],Power [W],Transmitting [bool]\n"
         )
+        self.writer = csv.writer(self.file, lineterminator="\n")
 
         # Initialise time step calculation
         self.last_timestamp = 0
         self.side = side
+        self.verbose = verbose
+
+        # Running totals for the rate limited average print.
+        self.raw_sum = 0
+        self.raw_count = 0
+        self.last_print = 0.0
 
-    def add_fast(self, unix_time: float, data: List[StrainData]) -> None:
+    def add_fast(self, unix_time: float, data: np.ndarray) -> None:
         """Adds high speed data to the side.
 
         Args:
-            data (List[StrainData]): The data to add.
+            data (np.ndarray): The data to add (structured array of STRAIN_DTYPE).
 
         Returns:
             None
         """
-        # Select which file to write to
-        raw_sum = 0
-        for i in data:
-            timestep = i.timestamp - self.last_timestamp
-            self.last_timestamp = i.timestamp
-            # print(f"{self.side.name}: ({timestep:>10d}) {i}")
-            raw_sum += i.raw
-            self.file.write(
-                f"{unix_time},{i.timestamp},{timestep},{i.velocity},{i.position},{i.raw},{i.torque},{i.power},{i.transmitting}\n"
+        if len(data) == 0:
+            return
+
+        # Work out the time steps for the whole message at once.
+        timestamps = data["timestamp"].astype(np.int64)
+        timesteps = np.diff(timestamps, prepend=self.last_timestamp)
+        self.last_timestamp = int(timestamps[-1])
+        self.raw_sum += int(data["raw"].sum())
+        self.raw_count += len(data)
+
+        # Write the whole message in one go. tolist gives plain python numbers
+        # so the CSV matches what struct gave.
+        self.writer.writerows(
+            zip(
+                repeat(unix_time),
+                timestamps.tolist(),
+                timesteps.tolist(),
+                data["velocity"].tolist(),
+                data["position"].tolist(),
+                data["raw"].tolist(),
+                data["torque"].tolist(),
+                data["power"].tolist(),
+                data["transmitting"].tolist(),
             )
+        )
 
-        # Print out the average
-        print(f"{self.side.name:<10s}: {raw_sum//len(data):>10d}")
+        if self.verbose:
+            # Only format each record when asked, as this is slow.
+            for i, timestep in enumerate(timesteps.tolist()):
+                print(
+                    f"{self.side.name}: ({timestep:>10d}) {StrainData(data, i * StrainData.SIZE)}"
+                )
+
+        # Print out the average since the last print. Printing every batch can
+        # block on slow terminals, so only do this every so often.
+        now = time.monotonic()
+        if now - self.last_print > PRINT_INTERVAL:
+            print(f"{self.side.name:<10s}: {self.raw_sum//self.raw_count:>10d}")
+            self.raw_sum = 0
+            self.raw_count = 0
+            self.last_print = now
 
     def close(self) -> None:
         self.file.close()
@@ -187,114 +252,194 @@ class CSVSide:
 class CSVHandler(DataHandler):
     """Class for accepting data and saving this to a folder of CSVs."""
 
-    def __init__(self, output: str):
+    def __init__(self, output: str, verbose: bool = False):
         # Create the folder
         print(f"Creating folder '{output}'")
-        if not os.path.exists(output):
-            os.makedirs(output)
+        os.makedirs(output, exist_ok=True)
 
         # Create the about file
         json_str_header = "Unix Timestamp [s],Message\n"
-        self.about_file = open(f"{output}/about.csv", "w", buffering=1)
+        self.about_file = open(f"{output}/about.csv", "w", buffering=1, newline="")
         self.about_file.write(json_str_header)
+        self.about_writer = csv.writer(self.about_file, lineterminator="\n")
 
         # Create the housekeeping file
-        self.housekeeping_file = open(f"{output}/housekeeping.csv", "w", buffering=1)
+        self.housekeeping_file = open(
+            f"{output}/housekeeping.csv", "w", buffering=1, newline=""
+        )
         self.housekeeping_file.write(
             "Unix Timestamp [s],Left Temperature [C],Right Temperature [C],IMU Temperature [C],Battery [mV],Left Offset [raw],Right Offset [raw]\n"
         )
+        self.housekeeping_writer = csv.writer(
+            self.housekeeping_file, lineterminator="\n"
+        )
 
         # Create the IMU file
-        self.imu_file = open(f"{output}/imu.csv", "w", buffering=1)
+        self.imu_file = open(
+            f"{output}/imu.csv", "w", buffering=CSV_BUFFER_SIZE, newline=""
+        )
         self.imu_file.write(
             "Unix Timestamp [s],Device Timestamp [us],Timestep[us],Velocity [rad/s],Position [rad],Acceleration X [m/s^2],Acceleration Y [m/s^2],Acceleration Z [m/s^2],Gyro A [rad/s],Gyro B [rad/s],Gyro Z [rad/s]\n"
         )
+        self.imu_writer = csv.writer(self.imu_file, lineterminator="\n")
         self.last_imu_timestamp = 0
+        self.verbose = verbose
 
         # Create the strain gauge files
-        self.left = CSVSide(Side.LEFT, output)
-        self.right = CSVSide(Side.RIGHT, output)
+        self.left = CSVSide(Side.LEFT, output, verbose)
+        self.right = CSVSide(Side.RIGHT, output, verbose)
 
         # Create the slow file
-        self.slow = open(f"{output}/slow.csv", "w", buffering=1)
+        self.slow = open(
+            f"{output}/slow.csv", "w", buffering=CSV_BUFFER_SIZE, newline=""
+        )
         self.slow.write(
             "Unix Timestamp [s],Device Timestamp [us],Cadence [rpm],Rotations [#],Power [W],Balance [%]\n"
         )
-
-    def add_imu(self, unix_time: float, data: bytes) -> None:
-        converted = self._process_imu(data)
-        for i in converted:
-            timestep = i.timestamp - self.last_imu_timestamp
-            self.last_imu_timestamp = i.timestamp
-            # print(f"({timestep:>10d}) {i}")
-            self.imu_file.write(
-                f"{unix_time},{i.timestamp},{timestep},{i.velocity},{i.position},{i.accel_x},{i.accel_y},{i.accel_z},{i.gyro_x},{i.gyro_y},{i.gyro_z}\n"
+        self.slow_writer = csv.writer(self.slow, lineterminator="\n")
+
+    def add_imu(self, unix_time: float, data: np.ndarray) -> None:
+        if len(data) == 0:
+            return
+
+        # Work out the time steps for the whole message at once.
+        timestamps = data["timestamp"].astype(np.int64)
+        timesteps = np.diff(timestamps, prepend=self.last_imu_timestamp)
+        self.last_imu_timestamp = int(timestamps[-1])
+
+        # Write the whole message in one go.
+        self.imu_writer.writerows(
+            zip(
+                repeat(unix_time),
+                timestamps.tolist(),
+                timesteps.tolist(),
+                data["velocity"].tolist(),
+                data["position"].tolist(),
+                data["accel_x"].tolist(),
+                data["accel_y"].tolist(),
+                data["accel_z"].tolist(),
+                data["gyro_x"].tolist(),
+                data["gyro_y"].tolist(),
+                data["gyro_z"].tolist(),
             )
+        )
+
+        if self.verbose:
+            # Only format each record when asked, as this is slow.
+            for i, timestep in enumerate(timesteps.tolist()):
+                print(f"({timestep:>10d}) {IMUData(data, i * IMUData.SIZE)}")
 
     def add_about(self, unix_time: float, data: str) -> None:
         print(f"About: {data}")
-        self.about_file.write(f"{unix_time},'{data}'\n")
+        # The csv module quotes the message properly, as it contains commas.
+        self.about_writer.writerow((unix_time, data))
 
-    def add_housekeeping(self, unix_time: float, data: str) -> None:
+    def add_housekeeping(self, unix_time: float, data: dict) -> None:
         print(f"Housekeeping: {data}")
-        data = json.loads(data)
-        self.housekeeping_file.write(
-            f"{unix_time},{data['temps']['left']},{data['temps']['right']},{data['temps']['imu']},{data['battery']},{data['left-offset']},{data['right-offset']}\n"
+        temps = data["temps"]
+        self.housekeeping_writer.writerow(
+            (
+                unix_time,
+                temps["left"],
+                temps["right"],
+                temps["imu"],
+                data["battery"],
+                data["left-offset"],
+                data["right-offset"],
+            )
         )
 
-    def add_fast(self, unix_time: float, data: str, side: Side) -> None:
-        # Process the data.
-        converted = self._process_strain(data)
-
+    def add_fast(self, unix_time: float, data: np.ndarray, side: Side) -> None:
         if side == Side.LEFT:
-            self.left.add_fast(unix_time, converted)
+            self.left.add_fast(unix_time, data)
         else:
-            self.right.add_fast(unix_time, converted)
-
-    def add_slow(self, unix_time: float, data: json) -> None:
-        self.slow.write(
-            f"{unix_time},{data['timestamp']},{data['cadence']},{data['rotations']},{data['power']},{data['balance']}\n"
+            self.right.add_fast(unix_time, data)
+
+    def add_slow(self, unix_time: float, data: dict) -> None:
+        self.slow_writer.writerow(
+            (
+                unix_time,
+                data["timestamp"],
+                data["cadence"],
+                data["rotations"],
+                data["power"],
+                data["balance"],
+            )
         )
 
+    def flush(self) -> None:
+        # The about and housekeeping files are line buffered, so only these
+        # can be holding anything back.
+        self.imu_file.flush()
+        self.slow.flush()
+        self.left.file.flush()
+        self.right.file.flush()
+
     def close(self):
         print("Closing CSV Handler")
         self.imu_file.close()
         self.about_file.close()
         self.housekeeping_file.close()
         self.slow.close()
+        self.left.close()
+        self.right.close()
 
 
 class GraphHandler(DataHandler):
     """Class that shows data on matplotlib."""
 
-    def __init__(self, max_history=None):
+    def __init__(self, max_history=None, decimate: int = 1):
+        """Creates the graphs.
+
+        Args:
+            max_history (int, optional): Maximum number of records to show. Defaults to None (show everything).
+            decimate (int, optional): Only show every nth record. Defaults to 1.
+        """
         self.imu_graph = IMULiveChart(max_history)
         self.torque_graph = TorqueLiveChart(max_history)
         self.power_graph = PowerLiveChart(max_history)
-        self.animate_process = Process(target=self.animate, daemon=True)
-        self.animate_process.start()
+        self.decimate = decimate
+
+    def _decimate(self, data: np.ndarray) -> np.ndarray:
+        """Keeps every nth record, plus the latest so the current angle is right.
+
+        Args:
+            data (np.ndarray): The decoded records.
 
-    def add_imu(self, unix_time: float, data: bytes) -> None:
-        converted = self._process_imu(data)
+        Returns:
+            np.ndarray: The records to show.
+        """
+        if self.decimate <= 1 or len(data) == 0:
+            return data
+
+        result = data[:: self.decimate]
+        if (len(data) - 1) % self.decimate:
+            result = np.concatenate((result, data[-1:]))
+        return result
+
+    def add_imu(self, unix_time: float, data: np.ndarray) -> None:
+        converted = self._decimate(data)
         self.imu_graph.add_data(converted)
 
     def add_about(self, unix_time: float, data: str) -> None:
         return super().add_about(data)
 
-    def add_fast(self, unix_time: float, data: str, side: Side) -> None:
-        converted = self._process_strain(data)
+    def add_fast(self, unix_time: float, data: np.ndarray, side: Side) -> None:
+        converted = self._decimate(data)
         self.torque_graph.add_data(SideDataPair(side, converted))
         self.power_graph.add_data(SideDataPair(side, converted))
 
     def close(self) -> None:
-        self.animate_process.kill()
+        plt.close("all")
 
-    def add_slow(self, unix_time: float, data: str) -> None:
+    def add_slow(self, unix_time: float, data: dict) -> None:
         print(data)
         self.imu_graph.update_cadence_subtitle(data["cadence"])
         self.power_graph.update_power_subtitle(data["power"], data["balance"])
 
     def animate(self) -> None:
+        """Shows the graphs. This blocks until they are closed, so needs to be
+        called from the main thread."""
         self.imu_graph.setup_animation()
         self.torque_graph.setup_animation()
         self.power_graph.setup_animation()
@@ -310,7 +455,7 @@ class MultiHandler(DataHandler):
         """
         self.handlers = handlers
 
-    def add_imu(self, unix_time: float, data: bytes) -> None:
+    def add_imu(self, unix_time: float, data: np.ndarray) -> None:
         for h in self.handlers:
             h.add_imu(unix_time, data)
 
@@ -318,23 +463,154 @@ class MultiHandler(DataHandler):
         for h in self.handlers:
             h.add_about(unix_time, data)
 
-    def add_housekeeping(self, unix_time: float, data: str) -> None:
+    def add_housekeeping(self, unix_time: float, data: dict) -> None:
         for h in self.handlers:
             h.add_housekeeping(unix_time, data)
 
-    def add_fast(self, unix_time: float, data: str, side: Side) -> None:
+    def add_fast(self, unix_time: float, data: np.ndarray, side: Side) -> None:
         for h in self.handlers:
             h.add_fast(unix_time, data, side)
 
-    def add_slow(self, unix_time: float, data: str) -> None:
+    def add_slow(self, unix_time: float, data: dict) -> None:
         for h in self.handlers:
             h.add_slow(unix_time, data)
 
+    def flush(self) -> None:
+        for h in self.handlers:
+            h.flush()
+
     def close(self) -> None:
         for h in self.handlers:
             h.close()
 
 
+class ThreadedHandler(DataHandler):
+    def __init__(self, handler: DataHandler, max_queue: int = 1024) -> None:
+        """Passes data on to another handler from a background thread, so that
+        slow handlers (writing files) don't hold up receiving MQTT messages.
+
+        Args:
+            handler (DataHandler): The handler to run in the background.
+            max_queue (int, optional): Maximum number of messages to hold before dropping the oldest. Defaults to 1024.
+        """
+        self.handler = handler
+        self.queue = queue.Queue(max_queue)
+        self.dropped = 0
+        self.last_drop_warning = float("-inf")
+        self.closing = threading.Event()
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def _put(self, method, *args) -> None:
+        """Queues a call to the handler without ever blocking the caller. If the
+        queue is full, the oldest message is dropped to make room."""
+        if self.closing.is_set():
+            return
+
+        item = (method, args)
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+
+        try:
+            self.queue.get_nowait()
+            self._count_drop()
+        except queue.Empty:
+            pass  # The writer caught up in the meantime.
+
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self._count_drop()
+
+    def _count_drop(self) -> None:
+        """Counts a dropped message and warns about it every so often."""
+        self.dropped += 1
+        now = time.monotonic()
+        if now - self.last_drop_warning > DROP_WARNING_INTERVAL:
+            print(
+                f"Warning: the handler can't keep up, {self.dropped} messages dropped so far."
+            )
+            self.last_drop_warning = now
+
+    def _drain(self) -> None:
+        """Calls the handler with queued messages until told to stop (None).
+
+        Everything waiting (up to DRAIN_BATCH messages) is handled before the
+        handler is flushed, so the files are flushed once per batch. When busy,
+        the batches get bigger and flushes happen less often. When idle, nothing
+        is left sitting in the buffers.
+        """
+        while True:
+            try:
+                batch = [self.queue.get(timeout=STOP_CHECK_INTERVAL)]
+            except queue.Empty:
+                # Normally the stop marker ends things, but it could have been
+                # dropped if the queue was full while closing.
+                if self.closing.is_set():
+                    self._flush()
+                    return
+                continue
+
+            try:
+                while len(batch) < DRAIN_BATCH:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for item in batch:
+                if item is None:
+                    self._flush()
+                    return
+
+                method, args = item
+                try:
+                    method(*args)
+                except Exception:
+                    traceback.print_exc()
+
+            self._flush()
+
+    def _flush(self) -> None:
+        try:
+            self.handler.flush()
+        except Exception:
+            traceback.print_exc()
+
+    def add_imu(self, unix_time: float, data: np.ndarray) -> None:
+        self._put(self.handler.add_imu, unix_time, data)
+
+    def add_about(self, unix_time: float, data: str) -> None:
+        self._put(self.handler.add_about, unix_time, data)
+
+    def add_housekeeping(self, unix_time: float, data: dict) -> None:
+        self._put(self.handler.add_housekeeping, unix_time, data)
+
+    def add_fast(self, unix_time: float, data: np.ndarray, side: Side) -> None:
+        self._put(self.handler.add_fast, unix_time, data, side)
+
+    def add_slow(self, unix_time: float, data: dict) -> None:
+        self._put(self.handler.add_slow, unix_time, data)
+
+    def flush(self) -> None:
+        self._put(self.handler.flush)
+
+    def close(self) -> None:
+        # Finish off everything already queued before closing. If the marker
+        # can't be queued, the writer still stops once the queue is empty.
+        self.closing.set()
+        try:
+            self.queue.put(None, timeout=STOP_CHECK_INTERVAL)
+        except queue.Full:
+            pass
+        self.thread.join()
+        if self.dropped:
+            print(f"Dropped {self.dropped} messages as the handler couldn't keep up.")
+        self.handler.close()
+
+
 mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
 
 
@@ -374,6 +650,44 @@ def on_connect(
         print("Not subscribing to high-speed IMU messages.")
 
 
+def on_about(t: float, payload: bytes) -> None:
+    about = payload.decode()
+    print("About this device: " + about)
+    handler.add_about(t, about)
+
+
+def on_imu(t: float, payload: bytes) -> None:
+    handler.add_imu(t, decode_imu(payload))
+
+
+def on_housekeeping(t: float, payload: bytes) -> None:
+    # Decode once here rather than in every handler.
+    handler.add_housekeeping(t, json_loads(payload))
+
+
+def on_left(t: float, payload: bytes) -> None:
+    handler.add_fast(t, decode_strain(payload), Side.LEFT)
+
+
+def on_right(t: float, payload: bytes) -> None:
+    handler.add_fast(t, decode_strain(payload), Side.RIGHT)
+
+
+def on_slow(t: float, payload: bytes) -> None:
+    handler.add_slow(t, json_loads(payload))
+
+
+# Which function deals with each topic, so each message only needs one lookup.
+TOPIC_CALLBACKS = {
+    MQTT_TOPIC_ABOUT: on_about,
+    MQTT_TOPIC_IMU: on_imu,
+    MQTT_TOPIC_HOUSEKEEPING: on_housekeeping,
+    MQTT_TOPIC_LEFT: on_left,
+    MQTT_TOPIC_RIGHT: on_right,
+    MQTT_TOPIC_LOW_SPEED: on_slow,
+}
+
+
 def on_message(client: mqtt.Client, userdata: None, msg: mqtt.MQTTMessage) -> None:
     """Handles a received message from MQTT.
 
@@ -383,20 +697,29 @@ def on_message(client: mqtt.Client, userdata: None, msg: mqtt.MQTTMessage) -> No
         msg (mqtt.MQTTMessage): The message structure.
     """
     t = time.time()
-    if msg.topic == MQTT_TOPIC_ABOUT:
-        print("About this device: " + msg.payload.decode())
-        handler.add_about(t, msg.payload.decode())
-    elif msg.topic == MQTT_TOPIC_IMU:
-        handler.add_imu(t, msg.payload)
-    elif msg.topic == MQTT_TOPIC_HOUSEKEEPING:
-        handler.add_housekeeping(t, msg.payload.decode())
-    elif msg.topic == MQTT_TOPIC_LEFT:
-        handler.add_fast(t, msg.payload, Side.LEFT)
-    elif msg.topic == MQTT_TOPIC_RIGHT:
-        handler.add_fast(t, msg.payload, Side.RIGHT)
-    elif msg.topic == MQTT_TOPIC_LOW_SPEED:
-        data = json.loads(msg.payload)
-        handler.add_slow(t, data)
+    callback = TOPIC_CALLBACKS.get(msg.topic)
+    if callback is not None:
+        callback(t, msg.payload)
+
+
+def positive_int(argument: str) -> int:
+    """Parser for arguments that must be a whole number of at least 1.
+
+    Args:
+        argument (str): The argument to parse.
+
+    Returns:
+        int: The parsed number.
+    """
+    try:
+        value = int(argument)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{argument}' is not a whole number")
+
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+
+    return value
 
 
 if __name__ == "__main__":
@@ -429,6 +752,12 @@ if __name__ == "__main__":
         type=int,
         default=250,
     )
+    parser.add_argument(
+        "--graph-decimate",
+        help="Only graph every nth high speed record (the latest record in each message is always included). Must be at least 1.",
+        type=positive_int,
+        default=1,
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -436,6 +765,12 @@ if __name__ == "__main__":
         type=str,
         default=datetime.now().strftime("%Y%m%d_%H%M%S_PowerMeter"),
     )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="If present, prints every high speed record as it is saved. This is slow.",
+        action="store_true",
+    )
 
     # What to include
     group = parser.add_argument_group(
@@ -475,23 +810,35 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Setup the data handler
+    graph_handler = None
     if args.method == "csv":
-        handler = CSVHandler(args.output)
+        handler = ThreadedHandler(CSVHandler(args.output, args.verbose))
     elif args.method == "graph":
-        handler = GraphHandler(args.max_records)
+        handler = graph_handler = GraphHandler(args.max_records, args.graph_decimate)
     else:
         # Both
+        graph_handler = GraphHandler(args.max_records, args.graph_decimate)
         handler = MultiHandler(
-            (CSVHandler(args.output), GraphHandler(args.max_records))
+            (ThreadedHandler(CSVHandler(args.output, args.verbose)), graph_handler)
         )
 
+    # Make sure buffered data gets written out however the program stops
+    # (including Ctrl+C).
+    atexit.register(handler.close)
+
     # Setup MQTT and loop forever
     mqtt_client.on_connect = on_connect
     mqtt_client.on_message = on_message
     mqtt_client.connect(args.host)
     try:
-        mqtt_client.loop_forever()
+        if graph_handler is None:
+            mqtt_client.loop_forever()
+        else:
+            # Matplotlib needs the main thread, so run MQTT in the background
+            # until the graphs are closed.
+            mqtt_client.loop_start()
+            graph_handler.animate()
+            mqtt_client.loop_stop()
     except Exception as e:
         print(f"Exception causing data recording to stop: '{e}'")
         traceback.print_exc()
-        handler.close()
@@ -48,7 +48,7 @@ import datetime
 from fit_tool.fit_file import FitFile
 from fit_tool.profile.messages.record_message import RecordMessage
 
-from common import add_time_args, none_empty_list
+from common import add_time_args, none_empty_list, truncate_times as truncate_df_times
 
 class Importer(ABC):
     """Base class for importing power and cadence data."""
@@ -92,11 +92,7 @@ class Importer(ABC):
             start_time (Union[float, None]): The start time. If None, no filtering of minimum times is applied.
             stop_time (Union[float, None]): The stop time. If None, no filtering of maximum times is applied.
         """
-        if start_time is not None:
-            self.df = self.df.drop(self.df[self.df["Unix Timestamp [s]"] < start_time].index)
-        
-        if stop_time is not None:
-            self.df = self.df.drop(self.df[self.df["Unix Timestamp [s]"] > stop_time].index)
+        self.df = truncate_df_times(self.df, start_time, stop_time)
 
     def get_data(self) -> pd.DataFrame:
         """Returns the cadence over time.
@@ -28,7 +28,7 @@ from typing import Tuple
 import matplotlib.pyplot as plt
 import argparse
 
-from common import add_time_args, apply_time_args, apply_device_time_corrections
+from common import add_time_args, apply_time_args, apply_device_time_corrections, njit
 
 def accel_to_angle(accel_x: np.ndarray, accel_y: np.ndarray) -> np.ndarray:
     """Converts X and Y acceleration to angles.
@@ -40,30 +40,171 @@ def accel_to_angle(accel_x: np.ndarray, accel_y: np.ndarray) -> np.ndarray:
     Returns:
         np.ndarray: Angles between -pi and pi.
     """
-    # Calculate the angle from the accelerometer
-    small_angles = np.arctan(np.abs(accel_y / accel_x))
-    angles = np.empty(accel_x.size)
-    angles[(accel_x >= 0) & (accel_y >= 0)] = small_angles[
-        (accel_x >= 0) & (accel_y >= 0)
-    ]
-    angles[(accel_x < 0) & (accel_y >= 0)] = (
-        np.pi - small_angles[(accel_x < 0) & (accel_y >= 0)]
-    )
-    angles[(accel_x < 0) & (accel_y < 0)] = (
-        -np.pi + small_angles[(accel_x < 0) & (accel_y < 0)]
-    )
-    angles[(accel_x >= 0) & (accel_y < 0)] = -small_angles[
-        (accel_x >= 0) & (accel_y < 0)
-    ]
-    angles *= -1
+    # Calculate the angle from the accelerometer. Negating y gives the same
+    # (clockwise positive) convention as the onboard calculation.
+    angles = np.arctan2(-accel_y, accel_x)
     return angles
 
 
+@njit(cache=True)
+def limit_angles(value: float) -> float:
+    """Limits the given angle to between -pi and pi.
+
+    This takes constant time no matter how many turns the input is out by.
+
+    Args:
+        value (float): The input angle
+
+    Returns:
+        float: The limited angle.
+    """
+    return (value + np.pi) % (2 * np.pi) - np.pi
+
+
+@njit(cache=True)
+def angle_diff(angle1: float, angle2: float) -> float:
+    """Subtracts two angles from each other, wrapping around to use the shortest side of the circle.
+
+    Args:
+        angle1 (float): The first angle to subtract.
+        angle2 (float): The second angle to subtract
+
+    Returns:
+        float: angle1-angle2 taking into accound the cyclical nature of theta.
+    """
+    # Wrap into [-pi, pi) so that going the other way around the circle is used when
+    # over 1/2 a circle.
+    return limit_angles(angle1 - angle2)
+
+
+@njit(cache=True)
+def kalman_step(
+    x_prev: np.ndarray,
+    p_prev: np.ndarray,
+    time: float,
+    env_uncertainty: np.ndarray,
+    measured: np.ndarray,
+    meas_uncertainty: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A Kalman filter modified to work with angles.
+
+    This is compiled with numba (if installed), so all arrays should be float64.
+
+    Args:
+        x_prev (np.ndarray): The previous state as a 2 element vector (position first, angular velocity second).
+        p_prev (np.ndarray): The previous covariance matrix.
+        time (float): The time step from the last call.
+        env_uncertainty (np.ndarray): The environmental uncertainty covariance matrix.
+        measured (np.ndarray): The measured values at this step.
+        meas_uncertainty (np.ndarray): The covariance matrix representing the measured values' uncertainty. Only the diagonal is used.
+
+    Returns:
+        Tuple: the current position and current covariance matrix.
+    """
+    # Prediction. F = [[1, dt], [0, 1]] is expanded by hand (ignoring Bk u).
+    x_predict = np.array([x_prev[0] + time * x_prev[1], x_prev[1]])
+
+    # Limit theta
+    x_predict[0] = limit_angles(x_predict[0])
+
+    # F P F^T + Q
+    p_predict = np.array(
+        [
+            [
+                p_prev[0, 0] + time * (p_prev[0, 1] + p_prev[1, 0]) + time * time * p_prev[1, 1],
+                p_prev[0, 1] + time * p_prev[1, 1],
+            ],
+            [p_prev[1, 0] + time * p_prev[1, 1], p_prev[1, 1]],
+        ]
+    )
+    p_predict += env_uncertainty
+
+    # Update. Both states are measured directly (H is the identity) and R is diagonal, so
+    # each measurement can be applied on its own as a scalar update. This needs no matrix
+    # inverse, just a division per measurement.
+    x_prime = x_predict.copy()
+    p_prime = p_predict.copy()
+    for i in range(2):
+        if i == 0:
+            innovation = angle_diff(measured[0], x_prime[0])
+        else:
+            innovation = measured[1] - x_prime[1]
+
+        p_col = p_prime[:, i].copy()
+        p_row = p_prime[i, :].copy()
+        s = p_prime[i, i] + meas_uncertainty[i, i]
+        k_prime = p_col / s
+        x_prime += k_prime * innovation
+        # Joseph form for a single measured state, (I - k e_i^T) P (I - k e_i^T)^T + R_ii k k^T,
+        # expanded by hand. Unlike P - K H P, this stays positive definite even when K is
+        # slightly off due to rounding.
+        p_prime += (
+            s * np.outer(k_prime, k_prime)
+            - np.outer(k_prime, p_row)
+            - np.outer(p_col, k_prime)
+        )
+
+    x_prime[0] = limit_angles(x_prime[0])
+
+    return x_predict, x_prime, p_prime
+
+
+@njit(cache=True)
+def kalman_run(
+    time_steps: np.ndarray,
+    measurements: np.ndarray,
+    x0: np.ndarray,
+    p0: np.ndarray,
+    env_uncertainties: np.ndarray,
+    meas_uncertainties: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Runs the Kalman filter over a whole dataset for several sets of parameters at once.
+
+    This is useful for comparing or tuning the uncertainty matrices, as every set is run in a single compiled call.
+
+    Args:
+        time_steps (np.ndarray): The time since the previous measurement for each measurement (T elements).
+        measurements (np.ndarray): The measured angle and velocity at each timestamp (T rows, 2 columns).
+        x0 (np.ndarray): The initial state.
+        p0 (np.ndarray): The initial covariance matrix.
+        env_uncertainties (np.ndarray): The environmental uncertainty covariance matrix for each set (S x 2 x 2).
+        meas_uncertainties (np.ndarray): The measurement uncertainty covariance matrix for each set (S x 2 x 2).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The theta (position) and omega (velocity) for each set (S rows, T columns).
+    """
+    streams = env_uncertainties.shape[0]
+    thetas = np.zeros((streams, len(time_steps)))
+    omegas = np.zeros((streams, len(time_steps)))
+
+    for stream in range(streams):
+        # Initial states
+        x = x0  # Starting position.
+        p = p0  # Initially not confident where we are.
+
+        # Run the kalmin filter
+        for i in range(1, len(time_steps)):
+            _, x, p = kalman_step(
+                x,
+                p,
+                time_steps[i],
+                env_uncertainties[stream],
+                measurements[i],
+                meas_uncertainties[stream],
+            )
+
+            # Save the results for analysis later
+            thetas[stream, i] = x[0]
+            omegas[stream, i] = x[1]
+
+    return thetas, omegas
+
+
 def kalman(
-    time: np.ndarray,
+    time_steps: np.ndarray,
     angles: np.ndarray,
     gyro_z: np.ndarray,
-    x0: np.ndarray = np.array([[0], [0]]),
+    x0: np.ndarray = np.array([0.0, 0.0]),
     p0: np.ndarray = np.array([[1e4, 1e4], [1e4, 1e4]]),
     env_uncertainty: np.ndarray = np.array([[0.002, 0], [0, 0.1]]),
     meas_uncertainty: np.ndarray = np.array([[100, 0], [0, 0.01]]),
@@ -71,130 +212,35 @@ def kalman(
     """Runs a Kalman filter on this computer to verify the kalman filter on the imu.
 
     Args:
-        time (np.ndarray): The timestamps of each measurement.
-        accel_x (np.ndarray): The X acceleration in m/s^2, already corrected for centripedal force.
-        accel_y (np.ndarray): The Y acceleration in m/s^2, already corrected for centripedal force.
+        time_steps (np.ndarray): The time since the previous measurement for each measurement.
+        angles (np.ndarray): The angle calculated from the accelerometer in rad.
         gyro_z (np.ndarray): The rotation velocity in rad/s.
 
     Returns:
         Tuple[np.ndarray, np.ndarray]: The theta (position) vector and the omega (velocity) vector.
     """
-
-    def limit_angles(value: float) -> float:
-        """Limits the given angle to between -pi and pi.
-
-        Args:
-            value (float): The input angle
-
-        Returns:
-            float: The limited angle.
-        """
-        while value > np.pi or value <= -np.pi:
-            if value > np.pi:
-                value -= 2 * np.pi
-            elif value <= -np.pi:
-                value += 2 * np.pi
-
-        return value
-
-    def angle_diff(vector1: np.ndarray, vector2: np.ndarray) -> np.ndarray:
-        """Subtracts two thera-omega vectors from each other, wrapping around to use the shortest side of the circle.
-
-        Args:
-            vector1 (np.ndarray): The first vector to subtract.
-            vector2 (np.ndarray): The second vector to subtract
-
-        Returns:
-            np.ndarray: vector1-vector2 taking into accound the cyclical nature of theta.
-        """
-        difference = vector1[0] - vector2[0]
-        if abs(difference[0]) > np.pi:
-            # Over 1/2 circle, can go around the other way.
-            difference = 2 * np.pi - difference
-
-        result = np.array([difference, vector1[1] - vector2[1]])
-        return result
-
-    def kalman_step(
-        x_prev: np.ndarray,
-        p_prev: np.ndarray,
-        time: float,
-        env_uncertainty: np.ndarray,
-        measured: np.ndarray,
-        meas_uncertainty: np.ndarray,
-    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """A Kalman filter modified to work with angles.
-
-        Args:
-            x_prev (np.ndarray): The previous state as a 2 row, 1 column matrix (position on top, angular velocity below).
-            p_prev (np.ndarray): The previous covariance matrix.
-            time (float): The time step from the last call.
-            env_uncertainty (np.ndarray): The environmental uncertainty covariance matrix.
-            measured (np.ndarray): The measured values at this step.
-            meas_uncertainty (np.ndarray): The covariance matrix representing the measured values' uncertainty.
-
-        Returns:
-            Tuple: the current position and current covariance matrix.
-        """
-        x_prev = x_prev.reshape(2, 1)
-        measured = measured.reshape(2, 1)
-
-        # Prediction
-        fk = np.array([[1, time], [0, 1]])
-        x_predict = np.matmul(fk, x_prev)  # Ignoring Bk u
-
-        # Limit theta
-        x_predict[0] = limit_angles(x_predict[0])
-
-        p_predict = np.matmul(fk, p_prev)
-        p_predict = np.matmul(p_predict, fk.transpose())
-        p_predict = p_predict + env_uncertainty
-
-        # Update
-        hk = np.array([[1, 0], [0, 1]])
-        k_prime = p_predict.dot(hk.transpose()).dot(
-            np.linalg.inv(hk.dot(p_predict).dot(hk.transpose()) + meas_uncertainty)
-        )
-        x_prime = x_predict + k_prime.dot(angle_diff(measured, hk.dot(x_predict)))
-        p_prime = p_predict - k_prime.dot(hk).dot(p_predict)
-
-        x_prime[0] = limit_angles(x_prime[0])
-
-        return x_predict, x_prime, p_prime
-
-    # Run the code
+    # Run the code. Everything is passed as contiguous float64 so that the compiled
+    # version only ever needs to be specialised for one set of types and shapes.
     print("Running Kalman filter")
-    # Lists to save data in
-    thetas = np.zeros(shape=(len(time), 1))
-    omegas = np.zeros(shape=(len(time), 1))
-
-    # Initial states
-    x = x0  # Starting position.
-    p = p0  # Initially not confident where we are.
-
-    # Run the kalmin filter
-    for i in range(1, len(time)):  # // 3 for quicker testing
-        # Calculate parameters
-        timestep = time[i] - time[i - 1]
-        meas = np.array([angles[i], gyro_z[i]])
-
-        # Do the step
-        _, x, p = kalman_step(x, p, timestep, env_uncertainty, meas, meas_uncertainty)
-
-        # Save the results for analysis later
-        thetas[i] = x[0]
-        omegas[i] = x[1]
+    thetas, omegas = kalman_run(
+        np.ascontiguousarray(time_steps, dtype=np.float64),
+        np.column_stack((angles, gyro_z)).astype(np.float64),
+        np.ascontiguousarray(x0, dtype=np.float64).reshape(2),
+        np.ascontiguousarray(p0, dtype=np.float64).reshape(2, 2),
+        np.ascontiguousarray(env_uncertainty, dtype=np.float64).reshape(1, 2, 2),
+        np.ascontiguousarray(meas_uncertainty, dtype=np.float64).reshape(1, 2, 2),
+    )
     print("Finished running Kalman filter")
-    return thetas, omegas
+    return thetas[0], omegas[0]
 
 
 def integrate_gyro(
-    times: np.ndarray, gyro: np.ndarray, offset: float = 0
+    time_steps: np.ndarray, gyro: np.ndarray, offset: float = 0
 ) -> np.ndarray:
     """Integrates the gyroscope velocity data to estimate position. This will drift over time.
 
     Args:
-        times (np.ndarray): The times of the readings.
+        time_steps (np.ndarray): The time since the previous reading for each reading.
         gyro (np.ndarray): The gyroscope readings.
         offset (float): An offset to add to all angles.
 
@@ -202,11 +248,10 @@ def integrate_gyro(
         np.ndarray: The calculated positions.
     """
     # Integrate the gyroscope data to calculate position (with drift).
-    time_step = np.concatenate((np.array([0]), np.diff(times)))
-    impulse = gyro * time_step
-    full_angle = impulse.cumsum()
-    position = full_angle + offset
-    position -= 0.2  # Roughly zero the start
+    # Everything after the multiply is done in place on a single array.
+    position = np.multiply(gyro, time_steps)
+    np.cumsum(position, out=position)
+    position += offset - 0.2  # Roughly zero the start
     position %= 2 * np.pi
     position -= np.pi
     return position
@@ -220,7 +265,7 @@ def plot_imu(df: pd.DataFrame, name: str = ""):
         name (str): Name of the dataset to print in the figure title.
     """
     # Extract the data from the device.
-    times = df["Time"]
+    times = df["Time"].values
     accel_x = df["Acceleration X [m/s^2]"].values
     accel_y = df["Acceleration Y [m/s^2]"].values
     gyro_z = df["Gyro Z [rad/s]"].values
@@ -229,8 +274,9 @@ def plot_imu(df: pd.DataFrame, name: str = ""):
 
     # Calculate some other things to compare with.
     accel_position = accel_to_angle(accel_x, accel_y)
-    gyro_position = integrate_gyro(times, gyro_z)
-    kalman_position, kalman_velocity = kalman(times, accel_position, gyro_z)
+    time_steps = np.diff(times, prepend=times[0])
+    gyro_position = integrate_gyro(time_steps, gyro_z)
+    kalman_position, kalman_velocity = kalman(time_steps, accel_position, gyro_z)
 
     # Plot everything
     cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
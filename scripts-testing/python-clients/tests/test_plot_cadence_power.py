@@ -0,0 +1,39 @@
+"""Tests for plot_cadence_power.py. Run with `python -m pytest` from the python-clients folder."""
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plot_cadence_power.py")
+
+
+def write_slow_log(folder: str, count: int = 10) -> None:
+    """Writes a slow.csv like log_power_meter.py makes, one record per second."""
+    os.makedirs(folder)
+    pd.DataFrame(
+        {
+            "Unix Timestamp [s]": [1700000000.0 + i for i in range(count)],
+            "Device Timestamp [us]": [i * 1000000 for i in range(count)],
+            "Cadence [rpm]": 60.0,
+            "Rotations [#]": list(range(count)),
+            "Power [W]": 200.0,
+            "Balance [%]": 50.0,
+        }
+    ).to_csv(os.path.join(folder, "slow.csv"), index=False)
+
+
+def test_start_stop_limits_csv_output(tmp_path):
+    # The script needs fit_tool to import at all.
+    pytest.importorskip("fit_tool")
+    write_slow_log(str(tmp_path / "log"))
+
+    subprocess.run(
+        [sys.executable, SCRIPT, "-c", "log,run", "--start", "2", "--stop", "5", "--csv", "out_"],
+        cwd=tmp_path,
+        check=True,
+    )
+
+    times = pd.read_csv(tmp_path / "out_run.csv")["Unix Timestamp [s]"]
+    assert list(times) == [2.0, 3.0, 4.0, 5.0]